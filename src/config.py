@@ -1,11 +1,15 @@
 # config.py - Configuration settings for the crypto trading bot
+import types
+from dataclasses import dataclass, fields
 
-# Default configuration
-DEFAULT_CONFIG = {
+# Default configuration (read-only)
+DEFAULT_CONFIG = types.MappingProxyType({
     # Exchange settings
     "exchange_id": "okx",
     "base_currency": "USDT",
-    "trade_coins": ["BTC", "ETH", "SOL", "ADA", "DOT"],
+    "trade_coins": ("BTC", "ETH", "SOL", "ADA", "DOT"),
+    "fetch_workers": 5,      # Concurrent market data requests
+    "markets_cache_ttl": 86400,  # Reuse cached market definitions for 24 hours
     
     # Trading parameters
     "trade_amount": 100,
@@ -23,27 +27,61 @@ DEFAULT_CONFIG = {
     # Safety settings
     "max_trades_per_day": 5,
     "stop_loss_percent": 5.0,       # 5% stop loss
+    "order_workers": 1,             # Independent live order chains placed at once
     
     # Paths
-    "data_dir": "data"
-}
+    "data_dir": "data",
+    
+    # Persistence settings
+    "snapshot_flush_every": 10,     # Portfolio snapshots buffered per write
+    "parquet_rotate_bytes": 16 * 1024 * 1024  # Move JSON Lines history to Parquet past this size
+})
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Immutable bot configuration, see DEFAULT_CONFIG for default values"""
+    exchange_id: str
+    base_currency: str
+    trade_coins: tuple
+    fetch_workers: int
+    markets_cache_ttl: int
+    trade_amount: float
+    performance_period: str
+    check_interval: int
+    maker_fee: float
+    taker_fee: float
+    fee_discount: float
+    min_profit_threshold: float
+    max_trades_per_day: int
+    stop_loss_percent: float
+    order_workers: int
+    data_dir: str
+    snapshot_flush_every: int
+    parquet_rotate_bytes: int
 
 def load_config(config_file=None):
     """Load configuration from file if exists, otherwise use defaults"""
     import os
     import json
     
-    config = DEFAULT_CONFIG.copy()
-    
+    user_config = {}
     if config_file and os.path.exists(config_file):
         try:
             with open(config_file, 'r') as f:
                 user_config = json.load(f)
-                config.update(user_config)
         except Exception as e:
             print(f"Error loading config file: {e}")
     
+    config = {**DEFAULT_CONFIG, **user_config}
+    
+    # Drop settings the bot doesn't know about
+    known = {field.name for field in fields(Config)}
+    unknown = sorted(set(config) - known)
+    if unknown:
+        print(f"Ignoring unknown config keys: {', '.join(unknown)}")
+    config['trade_coins'] = tuple(config['trade_coins'])
+    
     # Create data directory if it doesn't exist
     os.makedirs(config['data_dir'], exist_ok=True)
     
-    return config
\ No newline at end of file
+    return Config(**{key: value for key, value in config.items() if key in known})
\ No newline at end of file
@@ -1,20 +1,189 @@
 # data_manager.py - Data storage and retrieval
 import os
 import json
+import atexit
+import glob
+import mmap
 from datetime import datetime
 import logging
 
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.json as pa_json
+    import pyarrow.parquet as pq
+except ImportError:  # Keep the whole history in JSON Lines
+    pq = None
+
 logger = logging.getLogger(__name__)
 
+
+def _encode_record(record):
+    """Encode a record as a single JSON Lines entry"""
+    if orjson is not None:
+        return orjson.dumps(record, default=str, option=orjson.OPT_NAIVE_UTC |
+                            orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(record, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+
+
+def _iso_timestamp(timestamp_ns):
+    """Format epoch nanoseconds as a local ISO timestamp, like datetime.now().isoformat()"""
+    seconds, nanos = divmod(timestamp_ns, 1_000_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=nanos // 1000).isoformat()
+
+
+def _normalize_trade(trade):
+    """
+    Replace a raw timestamp_ns with the ISO timestamp trades are stored and loaded with,
+    in place so records already handed out by TradeLogic get the same shape
+    """
+    if 'timestamp_ns' in trade:
+        fields = {key: value for key, value in trade.items() if key != 'timestamp_ns'}
+        timestamp = _iso_timestamp(trade['timestamp_ns'])
+        trade.clear()
+        trade['timestamp'] = timestamp
+        trade.update(fields)
+    return trade
+
+
+def _read_records(path):
+    """Read all records from a JSON Lines file"""
+    with open(path, 'rb') as f:
+        if orjson is None:
+            return [json.loads(line) for line in f if line.strip()]
+        
+        # mmap can't map an empty file
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        
+        # Let the kernel page the file in on demand instead of reading it up front
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return [orjson.loads(line) for line in iter(mm.readline, b'') if line.strip()]
+
+
+def _record_layout(record, prefix=()):
+    """
+    List the key paths of a record in order, nested keys after their parent,
+    and the paths of its integer values, which Parquet may widen to floats
+    """
+    keys, ints = [], []
+    for key, value in record.items():
+        path = [*prefix, key]
+        keys.append(path)
+        if isinstance(value, dict):
+            nested_keys, nested_ints = _record_layout(value, path)
+            keys.extend(nested_keys)
+            ints.extend(nested_ints)
+        elif isinstance(value, int) and not isinstance(value, bool):
+            ints.append(path)
+    return keys, ints
+
+
+def _drop_nulls(record):
+    """Remove the null fields Parquet fills in for keys a record never had"""
+    return {key: _drop_nulls(value) if isinstance(value, dict) else value
+            for key, value in record.items() if value is not None}
+
+
+def _from_parquet_row(row):
+    """Rebuild a record from a Parquet row with its original keys, key order and integers"""
+    keys = row.pop('_keys', None)
+    int_paths = {tuple(path) for path in row.pop('_ints', None) or []}
+    if keys is None:  # Partition written without a layout
+        return _drop_nulls(row)
+    
+    record = {}
+    for path in keys:
+        source, target = row, record
+        for key in path[:-1]:
+            source, target = source[key], target[key]
+        value = source[path[-1]]
+        if isinstance(value, dict):
+            value = {}  # Filled in by the paths that follow
+        elif value is not None and tuple(path) in int_paths:
+            value = int(value)
+        target[path[-1]] = value
+    return record
+
+
+def _parquet_partitions(path):
+    """List the Parquet files rotated out of a JSON Lines file, oldest first"""
+    return sorted(glob.glob(f"{os.path.splitext(path)[0]}.*.parquet"))
+
+
+def _load_history(path):
+    """Read rotated Parquet partitions followed by the JSON Lines tail"""
+    partitions = _parquet_partitions(path)
+    if partitions and pq is None:
+        logger.warning(f"pyarrow is not installed, skipping {len(partitions)} Parquet files for {path}")
+        partitions = []
+    
+    records = []
+    for partition in partitions:
+        records.extend(_from_parquet_row(row) for row in pq.read_table(partition).to_pylist())
+    if os.path.exists(path):
+        records.extend(_read_records(path))
+    return records
+
+
+def _migrate_legacy_json(legacy_path, path):
+    """Import a JSON array file from before JSON Lines storage, then rename it"""
+    if not os.path.exists(legacy_path):
+        return
+    
+    try:
+        with open(legacy_path, 'rb') as f:
+            records = orjson.loads(f.read()) if orjson is not None else json.load(f)
+        if not isinstance(records, list):
+            raise ValueError("expected a JSON array")
+        
+        # The legacy records are the oldest, so they go ahead of anything already in the tail
+        existing = b''
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                existing = f.read()
+        with open(path + '.tmp', 'wb') as f:
+            f.write(b''.join(_encode_record(record) for record in records))
+            f.write(existing)
+        os.replace(path + '.tmp', path)
+        os.replace(legacy_path, legacy_path + '.migrated')
+        logger.info(f"Imported {len(records)} records from {legacy_path} into {path}")
+    except Exception as e:
+        logger.error(f"Could not import {legacy_path}, its records will not be loaded: {e}")
+
+
+def _append_records(path, records):
+    """Append records to a JSON Lines file"""
+    with open(path, 'ab') as f:
+        f.write(b''.join(_encode_record(record) for record in records))
+
+
 class DataManager:
     def __init__(self, config):
         """Initialize data manager"""
         self.config = config
-        self.data_dir = config['data_dir']
+        self.data_dir = config.data_dir
+        self.history_file = os.path.join(self.data_dir, 'trade_history.jsonl')
+        self.snapshot_file = os.path.join(self.data_dir, 'portfolio_snapshots.jsonl')
         
         # Ensure data directory exists
         os.makedirs(self.data_dir, exist_ok=True)
         
+        # One-time import of history saved as whole JSON arrays by earlier versions
+        _migrate_legacy_json(os.path.join(self.data_dir, 'trade_history.json'), self.history_file)
+        _migrate_legacy_json(os.path.join(self.data_dir, 'portfolio_snapshots.json'), self.snapshot_file)
+        
+        # Trades are appended through one long-lived handle, flushed after each save
+        self._trade_fp = open(self.history_file, 'ab', buffering=64 * 1024)
+        
+        # Compact oversized history before loading it
+        self.rotate_bytes = config.parquet_rotate_bytes
+        self.rotate_to_parquet()
+        
         # Initialize trade history
         self.trade_history = []
         self.load_trade_history()
@@ -23,59 +192,141 @@ class DataManager:
         self.portfolio_snapshots = []
         self.load_portfolio_snapshots()
         
+        # Snapshots are buffered and written in batches
+        self._snapshot_buffer = []
+        self._flush_every = config.snapshot_flush_every
+        atexit.register(self.close)
+        
         logger.info(f"Data manager initialized with {len(self.trade_history)} historical trades")
     
     def load_trade_history(self):
         """Load trade history from file"""
-        history_file = os.path.join(self.data_dir, 'trade_history.json')
-        if os.path.exists(history_file):
-            try:
-                with open(history_file, 'r') as f:
-                    self.trade_history = json.load(f)
+        try:
+            self.trade_history = _load_history(self.history_file)
+            if self.trade_history:
                 logger.info(f"Loaded {len(self.trade_history)} trades from history")
-            except Exception as e:
-                logger.error(f"Error loading trade history: {e}")
+        except Exception as e:
+            logger.error(f"Error loading trade history: {e}")
+    
+    def save_trade(self, trade_data):
+        """Append a single trade to the history file and flush it"""
+        try:
+            self._trade_fp.write(_encode_record(_normalize_trade(trade_data)))
+        except Exception as e:
+            logger.error(f"Error saving trade history: {e}")
+        self.flush_trades()
     
-    def save_trade_history(self):
-        """Save trade history to file"""
-        history_file = os.path.join(self.data_dir, 'trade_history.json')
+    def flush_trades(self):
+        """Flush buffered trades to the history file"""
         try:
-            with open(history_file, 'w') as f:
-                json.dump(self.trade_history, f, indent=2, default=str)
+            self._trade_fp.flush()
             logger.debug("Trade history saved")
         except Exception as e:
             logger.error(f"Error saving trade history: {e}")
     
     def add_trade(self, trade_data):
         """Add a trade to history and save"""
+        _normalize_trade(trade_data)
         self.trade_history.append(trade_data)
-        self.save_trade_history()
+        self.save_trade(trade_data)
+    
+    def add_trades_batch(self, trades):
+        """Add several trades to history and save them with a single write"""
+        for trade in trades:
+            _normalize_trade(trade)
+        self.trade_history.extend(trades)
+        try:
+            self._trade_fp.write(b''.join(_encode_record(trade) for trade in trades))
+        except Exception as e:
+            logger.error(f"Error saving trade history: {e}")
+        self.flush_trades()
     
     def load_portfolio_snapshots(self):
         """Load portfolio snapshots from file"""
-        snapshot_file = os.path.join(self.data_dir, 'portfolio_snapshots.json')
-        if os.path.exists(snapshot_file):
-            try:
-                with open(snapshot_file, 'r') as f:
-                    self.portfolio_snapshots = json.load(f)
+        try:
+            self.portfolio_snapshots = _load_history(self.snapshot_file)
+            if self.portfolio_snapshots:
                 logger.info(f"Loaded {len(self.portfolio_snapshots)} portfolio snapshots")
-            except Exception as e:
-                logger.error(f"Error loading portfolio snapshots: {e}")
+        except Exception as e:
+            logger.error(f"Error loading portfolio snapshots: {e}")
     
     def save_portfolio_snapshot(self, holdings, prices, total_value):
         """Save a snapshot of the current portfolio"""
         snapshot = {
             'timestamp': datetime.now().isoformat(),
-            'holdings': holdings,
-            'prices': prices,
+            'holdings': dict(holdings),
+            'prices': dict(prices),
             'total_value': total_value
         }
         self.portfolio_snapshots.append(snapshot)
+        self._snapshot_buffer.append(snapshot)
+        
+        if len(self._snapshot_buffer) >= self._flush_every:
+            self.flush()
+    
+    def flush(self):
+        """Write buffered portfolio snapshots to file"""
+        if not self._snapshot_buffer:
+            return
+        
+        try:
+            _append_records(self.snapshot_file, self._snapshot_buffer)
+            self._snapshot_buffer = []
+        except Exception as e:
+            logger.error(f"Error saving portfolio snapshot: {e}")
+        
+        self.rotate_to_parquet()
+    
+    def rotate_to_parquet(self):
+        """Move JSON Lines files past the size threshold into Parquet partitions"""
+        if pq is None:
+            return
+        
+        # Buffered trades must be on disk before the file is read
+        self.flush_trades()
+        
+        for path in (self.history_file, self.snapshot_file):
+            if not os.path.exists(path) or os.path.getsize(path) < self.rotate_bytes:
+                continue
+            
+            partition = f"{os.path.splitext(path)[0]}.{datetime.now().strftime('%Y%m%dT%H%M%S%f')}.parquet"
+            try:
+                # Read as a single block so column types are inferred from every record,
+                # keeping ISO timestamps as the strings the JSON Lines records hold
+                read_options = pa_json.ReadOptions(block_size=os.path.getsize(path) + 1)
+                parse_options = pa_json.ParseOptions(explicit_schema=pa.schema([('timestamp', pa.string())]),
+                                                     unexpected_field_behavior='infer')
+                table = pa_json.read_json(path, read_options=read_options, parse_options=parse_options)
+                
+                # Columns hold the union of all keys and a common type per field, so keep each
+                # record's own key paths (in order) and integer paths alongside its row
+                layouts = [_record_layout(record) for record in _read_records(path)]
+                if len(layouts) != table.num_rows:
+                    raise ValueError(f"read {table.num_rows} rows but {len(layouts)} records")
+                path_list = pa.list_(pa.list_(pa.string()))
+                table = table.append_column('_keys', pa.array([keys for keys, _ in layouts], type=path_list))
+                table = table.append_column('_ints', pa.array([ints for _, ints in layouts], type=path_list))
+                
+                # Write under a temporary name so a partial file is never loaded
+                pq.write_table(table, partition + '.tmp', compression='zstd')
+                os.replace(partition + '.tmp', partition)
+                
+                # Start a fresh tail
+                open(path, 'wb').close()
+                logger.info(f"Rotated {table.num_rows} records from {path} to {partition}")
+            except Exception as e:
+                logger.error(f"Error rotating {path} to Parquet: {e}")
+    
+    def close(self):
+        """Write all pending data, sync the trade history and close it"""
+        self.flush()
+        if self._trade_fp.closed:
+            return
         
-        # Save to file
-        snapshot_file = os.path.join(self.data_dir, 'portfolio_snapshots.json')
         try:
-            with open(snapshot_file, 'w') as f:
-                json.dump(self.portfolio_snapshots, f, indent=2, default=str)
+            self._trade_fp.flush()
+            os.fsync(self._trade_fp.fileno())
         except Exception as e:
-            logger.error(f"Error saving portfolio snapshot: {e}")
\ No newline at end of file
+            logger.error(f"Error saving trade history: {e}")
+        finally:
+            self._trade_fp.close()
\ No newline at end of file
@@ -1,6 +1,15 @@
 # exchange.py - Exchange interaction module
 import ccxt
+import json
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # Keep ccxt's own JSON decoder
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
@@ -8,9 +17,13 @@ class ExchangeHandler:
     def __init__(self, config, api_key=None, api_secret=None, api_passphrase=None):
         """Initialize exchange connection"""
         self.config = config
-        self.exchange_id = config['exchange_id']
-        self.base_currency = config['base_currency']
-        self.trade_pairs = [f"{coin}/{self.base_currency}" for coin in config['trade_coins']]
+        self.exchange_id = config.exchange_id
+        self.base_currency = config.base_currency
+        self._pairs = {coin: f"{coin}/{self.base_currency}" for coin in config.trade_coins}
+        self.trade_pairs = list(self._pairs.values())
+        self.fetch_workers = config.fetch_workers
+        self.markets_cache_file = os.path.join(config.data_dir, 'markets_cache.json')
+        self.markets_cache_ttl = config.markets_cache_ttl
         
         # Initialize exchange
         self.exchange = getattr(ccxt, self.exchange_id)({
@@ -20,21 +33,69 @@ class ExchangeHandler:
             'enableRateLimit': True
         })
         
+        # ccxt decodes every REST response through on_json_response;
+        # older releases use the stdlib json module there
+        if orjson is not None:
+            self.exchange.on_json_response = orjson.loads
+        
+        # Only spot markets are traded, so skip downloading derivatives where supported
+        fetch_markets_option = self.exchange.options.get('fetchMarkets')
+        if isinstance(fetch_markets_option, dict) and 'types' in fetch_markets_option:
+            fetch_markets_option['types'] = ['spot']
+        elif isinstance(fetch_markets_option, list):
+            self.exchange.options['fetchMarkets'] = ['spot']
+        
         # Fetch actual fee structure if possible
-        self.maker_fee = config['maker_fee']
-        self.taker_fee = config['taker_fee']
-        self.fee_discount = config['fee_discount']
+        self.maker_fee = config.maker_fee
+        self.taker_fee = config.taker_fee
+        self.fee_discount = config.fee_discount
+        
+        # Closed OHLCV candles keyed by (coin, timeframe, limit)
+        self._ohlcv_cache = {}
         
         logger.info(f"Exchange handler initialized for {self.exchange_id}")
         
         # Try to update fees from exchange
         self.update_fees_from_exchange()
     
+    def load_markets(self):
+        """Load market definitions, preferring a recent on-disk copy over a download"""
+        if self.exchange.markets:
+            return
+        
+        try:
+            if os.path.exists(self.markets_cache_file) and \
+                    time.time() - os.path.getmtime(self.markets_cache_file) < self.markets_cache_ttl:
+                with open(self.markets_cache_file, 'rb') as f:
+                    markets = orjson.loads(f.read()) if orjson is not None else json.load(f)
+                
+                # A cache written for a different set of coins is not enough
+                if set(self.trade_pairs) <= {market['symbol'] for market in markets}:
+                    self.exchange.set_markets(markets)
+                    logger.info(f"Loaded {len(markets)} markets from cache")
+                    return
+        except Exception as e:
+            logger.warning(f"Could not read markets cache: {e}")
+        
+        self.exchange.load_markets()
+        
+        # Only the markets we trade need to be cached
+        markets = [self.exchange.markets[pair] for pair in self.trade_pairs if pair in self.exchange.markets]
+        try:
+            with open(self.markets_cache_file, 'wb') as f:
+                if orjson is not None:
+                    f.write(orjson.dumps(markets, default=str))
+                else:
+                    f.write(json.dumps(markets, default=str).encode('utf-8'))
+        except Exception as e:
+            logger.warning(f"Could not write markets cache: {e}")
+    
     def update_fees_from_exchange(self):
         """Fetch and update fee structure from the exchange"""
+        self.clear_ohlcv_cache()
         try:
-            # Load markets to ensure we have the latest data
-            self.exchange.load_markets()
+            # Make sure markets are available
+            self.load_markets()
             
             # Some exchanges support fetching trading fees
             if hasattr(self.exchange, 'fetch_trading_fees'):
@@ -56,30 +117,90 @@ class ExchangeHandler:
             logger.warning(f"Could not fetch exchange fees: {e}. Using default values.")
             return False
     
+    def _pair(self, coin):
+        """Get the market symbol for trading coin against the base currency"""
+        pair = self._pairs.get(coin)
+        return pair if pair is not None else f"{coin}/{self.base_currency}"
+    
+    def _map_concurrent(self, func, coins):
+        """Apply func to each coin using a pool of worker threads"""
+        if not coins:
+            return []
+        
+        # The ccxt client is shared, so its rate limiter still applies across workers
+        with ThreadPoolExecutor(max_workers=min(len(coins), self.fetch_workers)) as executor:
+            return list(executor.map(func, coins))
+    
+    def _fetch_price(self, coin):
+        """Fetch the last price for a single coin"""
+        pair = self._pair(coin)
+        try:
+            ticker = self.exchange.fetch_ticker(pair)
+            return ticker['last']
+        except Exception as e:
+            logger.error(f"Error fetching price for {pair}: {str(e)}")
+            return None
+    
     def get_current_prices(self, coins):
         """Fetch current prices for the specified coins"""
         prices = {}
-        for coin in coins:
-            pair = f"{coin}/{self.base_currency}"
+        
+        # Prefer a single batched request when the exchange supports it
+        if coins and self.exchange.has.get('fetchTickers'):
+            pairs = [self._pair(coin) for coin in coins]
             try:
-                ticker = self.exchange.fetch_ticker(pair)
-                prices[coin] = ticker['last']
+                tickers = self.exchange.fetch_tickers(pairs)
+                for coin, pair in zip(coins, pairs):
+                    if pair in tickers:
+                        prices[coin] = tickers[pair]['last']
+                    else:
+                        logger.error(f"Error fetching price for {pair}: missing from tickers response")
+                return prices
             except Exception as e:
-                logger.error(f"Error fetching price for {pair}: {str(e)}")
+                logger.warning(f"Could not fetch tickers in one request: {e}. Fetching individually.")
+        
+        for coin, price in zip(coins, self._map_concurrent(self._fetch_price, coins)):
+            if price is not None:
+                prices[coin] = price
         return prices
     
+    def clear_ohlcv_cache(self):
+        """Drop all cached OHLCV data so the next fetch hits the exchange"""
+        self._ohlcv_cache.clear()
+    
     def fetch_ohlcv(self, coin, timeframe, limit=30):
-        """Fetch OHLCV data for a specific coin"""
-        pair = f"{coin}/{self.base_currency}"
+        """Fetch OHLCV data for a specific coin, reusing cached closed candles"""
+        key = (coin, timeframe, limit)
+        closed = self._ohlcv_cache.get(key)
+        pair = self._pair(coin)
         try:
-            return self.exchange.fetch_ohlcv(pair, timeframe, limit=limit)
+            if closed:
+                # Closed candles don't change, so only the latest ones are fetched
+                # and merged in, as long as they connect to the cached history
+                recent = self.exchange.fetch_ohlcv(pair, timeframe, limit=2)
+                bar_ms = self.exchange.parse_timeframe(timeframe) * 1000
+                if recent and recent[0][0] <= closed[-1][0] + bar_ms:
+                    ohlcv = (closed + [candle for candle in recent if candle[0] > closed[-1][0]])[-limit:]
+                    self._ohlcv_cache[key] = ohlcv[:-1]
+                    return ohlcv
+            
+            ohlcv = self.exchange.fetch_ohlcv(pair, timeframe, limit=limit)
+            if ohlcv:
+                # The last candle is the bar still forming, so it is never cached
+                self._ohlcv_cache[key] = ohlcv[:-1]
+            return ohlcv
         except Exception as e:
             logger.error(f"Error fetching OHLCV data for {pair}: {str(e)}")
             return None
     
+    def fetch_ohlcv_many(self, coins, timeframe, limit=30):
+        """Fetch OHLCV data for several coins concurrently"""
+        results = self._map_concurrent(lambda coin: self.fetch_ohlcv(coin, timeframe, limit=limit), coins)
+        return dict(zip(coins, results))
+    
     def execute_buy(self, coin, amount, simulate=True):
         """Execute a buy order"""
-        pair = f"{coin}/{self.base_currency}"
+        pair = self._pair(coin)
         try:
             if not simulate:
                 order = self.exchange.create_market_buy_order(pair, amount)
@@ -93,7 +214,7 @@ class ExchangeHandler:
     
     def execute_sell(self, coin, amount, simulate=True):
         """Execute a sell order"""
-        pair = f"{coin}/{self.base_currency}"
+        pair = self._pair(coin)
         try:
             if not simulate:
                 order = self.exchange.create_market_sell_order(pair, amount)
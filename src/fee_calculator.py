@@ -1,5 +1,6 @@
 # fee_calculator.py - Fee calculation utilities
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -10,7 +11,7 @@ class FeeCalculator:
         self.config = config
         self.maker_fee = exchange_handler.maker_fee
         self.taker_fee = exchange_handler.taker_fee
-        self.fee_discount = config['fee_discount']
+        self.fee_discount = config.fee_discount
         
         # Calculate effective fees
         self.effective_maker_fee = self.maker_fee * (1 - self.fee_discount)
@@ -19,8 +20,13 @@ class FeeCalculator:
         # For most market orders, we'll use taker fee
         self.standard_fee = self.effective_taker_fee
         
+        # Share of the amount kept after a buy, a sell and a rotation (sell then buy)
+        self.buy_multiplier = 1.0 - self.standard_fee
+        self.sell_multiplier = 1.0 - self.standard_fee
+        self.rotation_multiplier = self.sell_multiplier * self.buy_multiplier
+        
         # Calculate minimum profit threshold with fees
-        self.min_profit_threshold = config['min_profit_threshold']
+        self.min_profit_threshold = config.min_profit_threshold
         
         logger.info(f"Fee calculator initialized - Effective fees: Maker {self.effective_maker_fee*100:.4f}%, " +
                    f"Taker {self.effective_taker_fee*100:.4f}%")
@@ -37,34 +43,24 @@ class FeeCalculator:
         """Calculate round-trip fee (buy + sell)"""
         return amount * self.standard_fee * 2
     
-    def calculate_fee_adjusted_return(self, from_coin, to_coin, performance_data, base_currency):
+    def batch_fee_adjusted_return(self, sell_idx, buy_idx, scores, base_idx):
         """
-        Calculate the fee-adjusted expected return for a trade
-        Returns expected percentage gain/loss after fees
+        Calculate fee-adjusted returns for many trades at once
+        sell_idx and buy_idx index into scores, where base_idx marks the base currency
+        Returns an array of net returns after fees
         """
-        if from_coin == base_currency:
-            # We're just buying, so expected return is the performance score
-            # minus one fee (we're not selling yet)
-            expected_return = performance_data[to_coin]['score'] / 100  # Convert to decimal
-            fee_impact = self.standard_fee
-            
-        elif to_coin == base_currency:
-            # We're just selling, so no expected future return beyond selling fee
-            # If the coin has negative performance, selling is beneficial
-            expected_return = -performance_data[from_coin]['score'] / 100 if performance_data[from_coin]['score'] < 0 else 0
-            fee_impact = self.standard_fee
-            
-        else:
-            # Trading between two cryptos
-            # Expected return is the difference in performance minus round-trip fees
-            from_score = performance_data[from_coin]['score']
-            to_score = performance_data[to_coin]['score']
-            performance_diff = (to_score - from_score) / 100  # Convert to decimal
-            fee_impact = self.standard_fee * 2  # Two trades: sell first coin, buy second coin
-            
-            expected_return = performance_diff
+        from_scores = scores[sell_idx]
+        to_scores = scores[buy_idx]
+        buys = sell_idx == base_idx
+        sells = ~buys & (buy_idx == base_idx)
+        
+        # Rotations: difference in performance minus round-trip fees
+        returns = (to_scores - from_scores) / 100 - self.standard_fee * 2
+        
+        # Buys: performance of the coin bought minus one fee
+        returns[buys] = to_scores[buys] / 100 - self.standard_fee
         
-        # Net return after fees
-        net_return = expected_return - fee_impact
+        # Sells: avoided loss of a negative performer minus one fee
+        returns[sells] = np.maximum(-from_scores[sells], 0) / 100 - self.standard_fee
         
-        return net_return
\ No newline at end of file
+        return returns
\ No newline at end of file
@@ -56,7 +56,7 @@ def main():
     performance_calc = PerformanceCalculator(exchange, config)
     fee_calc = FeeCalculator(exchange, config)
     data_manager = DataManager(config)
-    trade_logic = TradeLogic(exchange, fee_calc, data_manager, config)
+    trade_logic = TradeLogic(exchange, fee_calc, data_manager, config, performance_calc)
     
     logger.info("Bot initialization complete")
     
@@ -68,20 +68,20 @@ def main():
             trade_logic.run_trading_cycle(simulate=args.simulate)
         else:
             # Run continuously
-            logger.info(f"Starting continuous trading bot with {config['check_interval']} second interval")
+            logger.info(f"Starting continuous trading bot with {config.check_interval} second interval")
             logger.info(f"Running in {'simulation' if args.simulate else 'live trading'} mode")
             
             while True:
-                cycle_start = datetime.now()
-                logger.info(f"Starting trading cycle at {cycle_start}")
+                cycle_start = time.monotonic()
+                logger.info(f"Starting trading cycle at {datetime.now()}")
                 
                 trade_logic.run_trading_cycle(simulate=args.simulate)
                 
                 # Calculate time to next cycle
-                elapsed = (datetime.now() - cycle_start).total_seconds()
-                sleep_time = max(1, config['check_interval'] - elapsed)
+                elapsed = time.monotonic() - cycle_start
+                sleep_time = max(1, config.check_interval - elapsed)
                 
-                next_cycle = datetime.now().timestamp() + sleep_time
+                next_cycle = time.time() + sleep_time
                 next_cycle_str = datetime.fromtimestamp(next_cycle).strftime('%Y-%m-%d %H:%M:%S')
                 
                 logger.info(f"Cycle complete. Next cycle at {next_cycle_str} (sleeping for {sleep_time:.1f} seconds)")
@@ -92,11 +92,15 @@ def main():
     except Exception as e:
         logger.error(f"Unexpected error: {e}", exc_info=True)
     finally:
+        # Write any buffered history before exiting
+        trade_logic.save_pending_trades()
+        data_manager.close()
+        
         # Final portfolio value
-        prices = exchange.get_current_prices(config['trade_coins'])
+        prices = exchange.get_current_prices(config.trade_coins)
         if prices:
             final_value = trade_logic.calculate_portfolio_value(prices)
-            logger.info(f"Final portfolio value: {final_value:.2f} {config['base_currency']}")
+            logger.info(f"Final portfolio value: {final_value:.2f} {config.base_currency}")
         
         logger.info("Bot execution completed")
 
@@ -1,17 +1,81 @@
 # performance.py - Performance calculation module
-import pandas as pd
 import numpy as np
 import logging
 
+try:
+    from numba import njit
+except ImportError:  # Run the metric kernel as plain Python
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
 logger = logging.getLogger(__name__)
 
+
+@njit(cache=True, error_model='numpy')
+def _compute_metrics(close, volume, window=14):
+    """
+    Calculate (change_pct, volatility, rsi, volume_trend, score)
+    from contiguous float64 close and volume arrays
+    """
+    n = close.shape[0]
+    change_pct = (close[n - 1] - close[0]) / close[0] * 100
+    
+    # Single pass over the closes: running return variance (Welford)
+    # plus RSI gains and losses over the last `window` periods
+    mean = 0.0
+    m2 = 0.0
+    gain = 0.0
+    loss = 0.0
+    for i in range(1, n):
+        delta = close[i] - close[i - 1]
+        ret = delta / close[i - 1]
+        diff = ret - mean
+        mean += diff / i
+        m2 += diff * (ret - mean)
+        
+        if i >= n - window:
+            if delta > 0:
+                gain += delta
+            else:
+                loss -= delta
+    
+    # Volatility (sample standard deviation of returns)
+    if n > 2:
+        volatility = np.sqrt(m2 / (n - 2)) * 100
+    else:
+        volatility = np.nan
+    
+    # Simple momentum indicator (RSI)
+    if n < window:
+        rsi = 50.0
+    elif loss > 0:
+        rsi = 100 - 100 / (1 + gain / loss)
+    else:
+        rsi = 100.0 if gain > 0 else 50.0
+    
+    # Volume trend
+    vol_change = (volume[-5:].mean() / volume[-10:-5].mean() - 1) * 100
+    
+    # Combine metrics into a composite score
+    # Higher score = better performance
+    score = change_pct - volatility * 0.5 + (rsi - 50) * 0.3 + vol_change * 0.2
+    
+    return change_pct, volatility, rsi, vol_change, score
+
+
 class PerformanceCalculator:
     def __init__(self, exchange_handler, config):
         """Initialize performance calculator"""
         self.exchange = exchange_handler
         self.config = config
-        self.performance_period = config['performance_period']
+        self.performance_period = config.performance_period
+        self.ohlcv_limit = 30
         
+        # Reused for every coin; column-major so close and volume slices are contiguous
+        self._ohlcv_buffer = np.empty((self.ohlcv_limit, 6), dtype=np.float64, order='F')
+    
     def calculate_performance(self, coins):
         """
         Calculate performance metrics for all coins
@@ -19,40 +83,25 @@ class PerformanceCalculator:
         """
         performance = {}
         
+        # Get historical OHLCV data for all coins at once
+        ohlcv_data = self.exchange.fetch_ohlcv_many(coins, self.performance_period, limit=self.ohlcv_limit)
+        
         for coin in coins:
             try:
-                # Get historical OHLCV data
-                ohlcv = self.exchange.fetch_ohlcv(coin, self.performance_period, limit=30)
+                ohlcv = ohlcv_data[coin]
                 if not ohlcv:
                     continue
-                    
-                df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-                df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-                df.set_index('timestamp', inplace=True)
-                
-                # Calculate various performance metrics
-                change_pct = (df['close'].iloc[-1] - df['close'].iloc[0]) / df['close'].iloc[0] * 100
-                
-                # Calculate volatility (standard deviation of returns)
-                returns = df['close'].pct_change().dropna()
-                volatility = returns.std() * 100
                 
-                # Simple momentum indicator (RSI)
-                delta = df['close'].diff()
-                gain = delta.where(delta > 0, 0).rolling(window=14).mean()
-                loss = -delta.where(delta < 0, 0).rolling(window=14).mean()
-                rs = gain / loss
-                rsi = 100 - (100 / (1 + rs)).fillna(50).iloc[-1]
+                ohlcv = ohlcv[-self.ohlcv_limit:]
+                n = len(ohlcv)
+                self._ohlcv_buffer[:n] = ohlcv
+                close = self._ohlcv_buffer[:n, 4]
+                volume = self._ohlcv_buffer[:n, 5]
                 
-                # Volume trend
-                vol_change = (df['volume'].iloc[-5:].mean() / df['volume'].iloc[-10:-5].mean() - 1) * 100
-                
-                # Combine metrics into a composite score
-                # Higher score = better performance
-                score = change_pct - volatility * 0.5 + (rsi - 50) * 0.3 + vol_change * 0.2
+                change_pct, volatility, rsi, vol_change, score = _compute_metrics(close, volume)
                 
                 performance[coin] = {
-                    'price': df['close'].iloc[-1],
+                    'price': close[-1],
                     'change_pct': change_pct,
                     'volatility': volatility,
                     'rsi': rsi,
@@ -60,8 +109,9 @@ class PerformanceCalculator:
                     'score': score
                 }
                 
-                logger.debug(f"{coin} performance: {score:.2f}")
-                
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("%s performance: %.2f", coin, score)
+            
             except Exception as e:
                 logger.error(f"Error calculating performance for {coin}: {str(e)}")
         
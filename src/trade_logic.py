@@ -1,125 +1,233 @@
 # trade_logic.py - Trading decision logic
 import logging
-from datetime import datetime
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from datetime import datetime, timedelta
+
+try:
+    from numba import njit
+except ImportError:  # Run the decision kernel as plain Python
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
 
 logger = logging.getLogger(__name__)
 
+
+@njit(cache=True)
+def _decide_trades_core(scores, amounts, base_idx, trade_amount):
+    """
+    Generate candidate trades from per-coin scores and held amounts, base currency at base_idx
+    Returns (sell_idx, buy_idx) in decision order: buy of the top coin,
+    sells of losing holdings (worst first), rotations into the top coin
+    """
+    # Rank coins without a usable score (NaN or infinite, e.g. too few candles) last,
+    # otherwise argsort would sort NaN above every real score
+    ranking = np.where(np.isfinite(scores), scores, -np.inf)
+    
+    # Coins by ascending score, equal scores latest first: sorting the reversed
+    # scores stably and mapping back keeps the previous tie order
+    order = base_idx - 1 - np.argsort(ranking[::-1], kind='mergesort')
+    sorted_scores = ranking[order]
+    
+    # The last entry is the first coin with the highest score
+    top_idx = order[base_idx - 1]
+    
+    # Losing holdings, worst first: everything before the zero boundary that is held
+    # and really scored below zero
+    negatives = order[:np.searchsorted(sorted_scores, 0.0)]
+    losers = negatives[(amounts[negatives] > 0) & (scores[negatives] < 0)]
+    n_losers = losers.shape[0]
+    
+    sell_idx = np.empty(base_idx + n_losers + 1, dtype=np.int64)
+    buy_idx = np.empty_like(sell_idx)
+    k = 0
+    
+    # Buy the top coin with base currency
+    if amounts[base_idx] >= trade_amount:
+        sell_idx[k] = base_idx
+        buy_idx[k] = top_idx
+        k += 1
+    
+    # Sell poor performers
+    for j in range(n_losers):
+        sell_idx[k] = losers[j]
+        buy_idx[k] = base_idx
+        k += 1
+    
+    # Rotate other holdings into the top coin
+    for i in range(base_idx):
+        if i != top_idx and amounts[i] > 0:
+            sell_idx[k] = i
+            buy_idx[k] = top_idx
+            k += 1
+    
+    return sell_idx[:k], buy_idx[:k]
+
+
 class TradeLogic:
-    def __init__(self, exchange_handler, fee_calculator, data_manager, config):
+    def __init__(self, exchange_handler, fee_calculator, data_manager, config, performance_calculator):
         """Initialize trade logic"""
         self.exchange = exchange_handler
+        self.performance_calc = performance_calculator
         self.fee_calc = fee_calculator
         self.data_manager = data_manager
         self.config = config
         
-        self.base_currency = config['base_currency']
-        self.trade_coins = config['trade_coins']
-        self.trade_amount = config['trade_amount']
-        self.min_profit_threshold = config['min_profit_threshold']
+        self.base_currency = config.base_currency
+        self.trade_coins = config.trade_coins
+        self.trade_amount = config.trade_amount
+        self.min_profit_threshold = config.min_profit_threshold
         
-        # Initialize holdings
-        self.holdings = {coin: 0 for coin in self.trade_coins}
-        self.holdings[self.base_currency] = self.trade_amount
+        # Holdings are kept as an amount array aligned with _coin_index, base currency first
+        self._coin_index = {coin: i for i, coin in enumerate([self.base_currency, *self.trade_coins])}
+        self._amounts = np.zeros(len(self._coin_index))
+        self._amounts[0] = self.trade_amount
+        self._nonzero_coins = set()  # Trade coins currently held
         
         # Trading stats
         self.total_fees_paid = 0
         self.trades_executed = 0
         self.daily_trade_count = 0
         self.last_trade_day = None
+        self._next_day_start = 0.0  # Epoch time of the next local midnight
+        
+        # Last decision kernel inputs and its candidate trades
+        self._last_decision_key = None
+        self._last_candidates = None
+        
+        # Executed trades not yet handed to the data manager
+        self._pending_trades = []
+        
+        # Guards holdings and stats while live orders execute concurrently
+        self._state_lock = threading.Lock()
+        
+        # Order calls share one exchange client, whose rate limiter is not thread safe
+        self._order_lock = threading.Lock()
         
         logger.info(f"Trade logic initialized with {len(self.trade_coins)} coins")
     
+    @property
+    def holdings(self):
+        """Current holdings as a read-only {coin: amount} copy"""
+        return types.MappingProxyType(dict(zip(self._coin_index, self._amounts.tolist())))
+    
+    @holdings.setter
+    def holdings(self, holdings):
+        """Replace all holdings from {coin: amount}; coins not given are set to zero"""
+        unknown = set(holdings) - set(self._coin_index)
+        if unknown:
+            raise ValueError(f"Unknown coins in holdings: {', '.join(sorted(unknown))}")
+        
+        with self._state_lock:
+            self._amounts[:] = 0.0
+            for coin, amount in holdings.items():
+                self._amounts[self._coin_index[coin]] = amount
+            self._nonzero_coins.clear()
+            self._update_held(*self.trade_coins)
+    
     def reset_daily_trade_count(self):
         """Reset daily trade count if it's a new day"""
+        # Only look up the local date once the current day is over
+        if time.time() < self._next_day_start:
+            return False
+        
         today = datetime.now().date()
+        self._next_day_start = datetime.combine(today + timedelta(days=1), datetime.min.time()).timestamp()
         if self.last_trade_day != today:
             self.daily_trade_count = 0
             self.last_trade_day = today
             return True
         return False
     
-    def decide_trades(self, performance_data, prices):
+    def decide_trades(self, performance_data, prices, snapshot=None):
         """
         Decide which trades to make based on performance data,
-        accounting for trading fees
+        accounting for trading fees, using a holdings snapshot if given
         Returns list of trades to execute (sell_coin, buy_coin, expected_return)
         """
         # Reset daily trade count if needed
         self.reset_daily_trade_count()
         
         # Check if we've hit the daily trade limit
-        if self.daily_trade_count >= self.config['max_trades_per_day']:
-            logger.info(f"Daily trade limit reached ({self.config['max_trades_per_day']}). No trades will be executed.")
+        if self.daily_trade_count >= self.config.max_trades_per_day:
+            logger.info(f"Daily trade limit reached ({self.config.max_trades_per_day}). No trades will be executed.")
+            return []
+        
+        coins = list(performance_data)
+        if not coins:
+            logger.warning("No performance data available. No trades will be executed.")
             return []
         
-        # Sort coins by performance score
-        ranked_coins = sorted(performance_data.items(), 
-                              key=lambda x: x[1]['score'], 
-                              reverse=True)
+        # Without base currency to spend or any scored holdings there is no candidate trade,
+        # so skip building the arrays and running the kernel
+        holdings_amounts, held = snapshot if snapshot is not None else self._holdings_snapshot()
+        if holdings_amounts[0] < self.trade_amount and held.isdisjoint(performance_data):
+            return []
+        
+        # Scores and held amounts as arrays indexed like coins, with the base currency last
+        base_idx = len(coins)
+        labels = coins + [self.base_currency]
+        scores = np.fromiter((performance_data[coin]['score'] for coin in coins), dtype=np.float64, count=base_idx)
+        
+        # Gather held amounts in one pass; coins we don't track (-1) count as not held
+        held_idx = np.fromiter((self._coin_index.get(coin, -1) for coin in labels), dtype=np.intp, count=base_idx + 1)
+        amounts = np.where(held_idx >= 0, holdings_amounts[held_idx], 0.0)
+        
+        # Unchanged scores and holdings (e.g. repeated cycles in paper trading or replay)
+        # give the same candidates, so only rerun the kernel when an input changed
+        key = (tuple(coins), scores.tobytes(), amounts.tobytes(), self.trade_amount,
+               self.fee_calc.standard_fee, self.min_profit_threshold)
+        if key != self._last_decision_key:
+            sell_idx, buy_idx = _decide_trades_core(scores, amounts, base_idx, float(self.trade_amount))
+            returns = self.fee_calc.batch_fee_adjusted_return(sell_idx, buy_idx, np.append(scores, np.nan), base_idx)
+            
+            # Selling poor performers is worth it if we lose less by selling than keeping,
+            # buys and rotations must clear the minimum profit threshold
+            accepted = np.where(buy_idx == base_idx,
+                                returns > -self.fee_calc.standard_fee,
+                                returns > self.min_profit_threshold)
+            self._last_candidates = list(zip(sell_idx.tolist(), buy_idx.tolist(), returns.tolist(), accepted.tolist()))
+            self._last_decision_key = key
         
         trades = []
-        current_holdings = []
-        
-        # Find what we're currently holding
-        for coin, amount in self.holdings.items():
-            if coin != self.base_currency and amount > 0:
-                current_holdings.append(coin)
-        
-        # Get top performing coin
-        top_coin = ranked_coins[0][0]
-        
-        # If we're holding base currency and there's a good performer, consider buying it
-        if self.holdings[self.base_currency] >= self.trade_amount:
-            # Calculate expected return after fees
-            expected_return = self.fee_calc.calculate_fee_adjusted_return(
-                self.base_currency, top_coin, performance_data, self.base_currency
-            )
+        
+        # Skip building the decision messages when INFO is filtered out
+        log_info = logger.isEnabledFor(logging.INFO)
+        for i, j, expected_return, accept in self._last_candidates:
+            sell_coin = labels[i]
+            buy_coin = labels[j]
+            if accept:
+                trades.append((sell_coin, buy_coin, expected_return))
+            if not log_info:
+                continue
             
-            # Only buy if expected return is positive after fees
-            if expected_return > self.min_profit_threshold:
-                trades.append((self.base_currency, top_coin, expected_return))
-                logger.info(f"Planning to buy {top_coin} using {self.base_currency}, " +
-                           f"expected return: {expected_return*100:.2f}% after fees")
-            else:
-                logger.info(f"Holding {self.base_currency}: Expected return after fees " +
-                           f"({expected_return*100:.2f}%) below threshold ({self.min_profit_threshold*100:.2f}%)")
-        
-        # If we're holding any bottom performers, consider selling them
-        for coin, perf in reversed(ranked_coins):
-            if coin in current_holdings and perf['score'] < 0:
-                # Calculate expected return of selling to base currency
-                expected_return = self.fee_calc.calculate_fee_adjusted_return(
-                    coin, self.base_currency, performance_data, self.base_currency
-                )
-                
-                # Selling poor performers might be worth it even with fees
-                if expected_return > -self.fee_calc.standard_fee:  # If we lose less by selling than keeping
-                    trades.append((coin, self.base_currency, expected_return))
-                    logger.info(f"Planning to sell {coin} due to poor performance " +
-                               f"(score: {perf['score']:.2f}, expected return: {expected_return*100:.2f}% after fees)")
+            if i == base_idx:
+                if accept:
+                    logger.info(f"Planning to buy {buy_coin} using {self.base_currency}, " +
+                               f"expected return: {expected_return*100:.2f}% after fees")
+                else:
+                    logger.info(f"Holding {self.base_currency}: Expected return after fees " +
+                               f"({expected_return*100:.2f}%) below threshold ({self.min_profit_threshold*100:.2f}%)")
+            elif j == base_idx:
+                if accept:
+                    logger.info(f"Planning to sell {sell_coin} due to poor performance " +
+                               f"(score: {scores[i]:.2f}, expected return: {expected_return*100:.2f}% after fees)")
                 else:
-                    logger.info(f"Not selling {coin} despite poor performance - " +
+                    logger.info(f"Not selling {sell_coin} despite poor performance - " +
                                f"selling cost ({self.fee_calc.standard_fee*100:.2f}%) exceeds potential benefit")
-        
-        # Consider rotation from lower performing to top performer
-        for coin in current_holdings:
-            if coin != top_coin:
-                # Calculate expected return of rotation
-                expected_return = self.fee_calc.calculate_fee_adjusted_return(
-                    coin, top_coin, performance_data, self.base_currency
-                )
-                
-                # Only rotate if expected return exceeds our minimum threshold
-                if expected_return > self.min_profit_threshold:
-                    trades.append((coin, top_coin, expected_return))
-                    logger.info(f"Planning to rotate from {coin} to {top_coin}, " +
+            else:
+                if accept:
+                    logger.info(f"Planning to rotate from {sell_coin} to {buy_coin}, " +
                                f"expected return: {expected_return*100:.2f}% after fees")
                 else:
-                    coin_score = performance_data[coin]['score']
-                    top_score = performance_data[top_coin]['score']
-                    diff = top_score - coin_score
+                    diff = scores[j] - scores[i]
                     
-                    logger.info(f"Not rotating {coin}->{top_coin}: Performance diff {diff:.2f}% " +
+                    logger.info(f"Not rotating {sell_coin}->{buy_coin}: Performance diff {diff:.2f}% " +
                                f"not sufficient after fees ({self.min_profit_threshold*100:.2f}%)")
         
         return trades
@@ -127,186 +235,260 @@ class TradeLogic:
     def execute_trade(self, sell_coin, buy_coin, prices, expected_return, simulate=True):
         """
         Execute a trade from sell_coin to buy_coin
-        Returns (success, fee_paid, trade_record)
+        Returns (success, fee_paid, trade_record); the record's timestamp_ns
+        becomes an ISO 'timestamp' when the data manager saves it
         """
+        # Taken before any order is placed; formatted as an ISO timestamp when saved
+        timestamp_ns = time.time_ns()
+        
+        if sell_coin == self.base_currency:
+            execute = self._exec_buy
+        elif buy_coin == self.base_currency:
+            execute = self._exec_sell
+        else:
+            execute = self._exec_rotation
+        
+        try:
+            return execute(sell_coin, buy_coin, prices, expected_return, timestamp_ns, simulate)
+        except Exception as e:
+            logger.error(f"Error executing trade: {e}")
+            return False, 0, None
+    
+    def _exec_buy(self, sell_coin, buy_coin, prices, expected_return, timestamp_ns, simulate):
+        """Buy buy_coin with base currency"""
+        balance = float(self._amounts[0])
+        trade_amount = balance if balance < self.trade_amount else self.trade_amount
+        if trade_amount <= 0:
+            logger.warning(f"Insufficient {self.base_currency} balance")
+            return False, 0, None
+        
+        fee_amount = trade_amount * self.fee_calc.standard_fee
+        crypto_amount = trade_amount * self.fee_calc.buy_multiplier / prices[buy_coin]
+        
+        logger.info("Buying %.6f %s at %s %s", crypto_amount, buy_coin, prices[buy_coin], self.base_currency)
+        logger.info("Fee: %.6f %s (%.3f%%)", fee_amount, self.base_currency, self.fee_calc.standard_fee * 100)
+        
+        # Execute the trade
+        if not simulate:
+            with self._order_lock:
+                order = self.exchange.execute_buy(buy_coin, crypto_amount)
+            if not order:
+                logger.error("Buy order failed")
+                return False, 0, None
+        
+        # Update holdings
+        with self._state_lock:
+            self._amounts[self._coin_index[buy_coin]] += crypto_amount
+            self._amounts[0] -= trade_amount
+            self._update_held(buy_coin)
+        
+        # Trade record
         trade_record = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp_ns': timestamp_ns,
             'sell_coin': sell_coin,
             'buy_coin': buy_coin,
-            'expected_return': expected_return
+            'expected_return': expected_return,
+            'type': 'buy',
+            'amount': crypto_amount,
+            'price': prices[buy_coin],
+            'fee': fee_amount,
+            'fee_currency': self.base_currency,
+            'simulated': simulate
         }
         
-        try:
-            if sell_coin == self.base_currency:
-                # We're buying a crypto with base currency
-                trade_amount = min(self.holdings[self.base_currency], self.trade_amount)
-                if trade_amount <= 0:
-                    logger.warning(f"Insufficient {self.base_currency} balance")
-                    return False, 0, None
-                    
-                fee_amount = self.fee_calc.calculate_buy_fee(trade_amount)
-                effective_amount = trade_amount - fee_amount
-                
-                crypto_amount = effective_amount / prices[buy_coin]
-                
-                logger.info(f"Buying {crypto_amount:.6f} {buy_coin} at {prices[buy_coin]} {self.base_currency}")
-                logger.info(f"Fee: {fee_amount:.6f} {self.base_currency} ({self.fee_calc.standard_fee*100:.3f}%)")
-                
-                # Execute the trade
-                if not simulate:
-                    order = self.exchange.execute_buy(buy_coin, crypto_amount)
-                    if not order:
-                        logger.error("Buy order failed")
-                        return False, 0, None
-                
-                # Update holdings
-                self.holdings[self.base_currency] -= trade_amount
-                self.holdings[buy_coin] += crypto_amount
-                
-                # Complete trade record
-                trade_record.update({
-                    'type': 'buy',
-                    'amount': crypto_amount,
-                    'price': prices[buy_coin],
-                    'fee': fee_amount,
-                    'fee_currency': self.base_currency,
-                    'simulated': simulate
-                })
-                
-                # Update stats
-                self.total_fees_paid += fee_amount
-                self.trades_executed += 1
-                self.daily_trade_count += 1
-                
-                # Save trade to history
-                self.data_manager.add_trade(trade_record)
-                
-                return True, fee_amount, trade_record
-                
-            elif buy_coin == self.base_currency:
-                # We're selling a crypto for base currency
-                amount_to_trade = self.holdings[sell_coin]
-                
-                if amount_to_trade <= 0:
-                    logger.warning(f"Insufficient {sell_coin} balance")
-                    return False, 0, None
-                
-                base_amount = amount_to_trade * prices[sell_coin]
-                fee_amount = self.fee_calc.calculate_sell_fee(base_amount)
-                net_base_amount = base_amount - fee_amount
-                
-                logger.info(f"Selling {amount_to_trade:.6f} {sell_coin} at {prices[sell_coin]} {self.base_currency}")
-                logger.info(f"Fee: {fee_amount:.6f} {self.base_currency} ({self.fee_calc.standard_fee*100:.3f}%)")
-                
-                # Execute the trade
-                if not simulate:
-                    order = self.exchange.execute_sell(sell_coin, amount_to_trade)
-                    if not order:
-                        logger.error("Sell order failed")
-                        return False, 0, None
-                
-                # Update holdings
-                self.holdings[self.base_currency] += net_base_amount
-                self.holdings[sell_coin] = 0
-                
-                # Complete trade record
-                trade_record.update({
-                    'type': 'sell',
-                    'amount': amount_to_trade,
-                    'price': prices[sell_coin],
-                    'fee': fee_amount,
-                    'fee_currency': self.base_currency,
-                    'simulated': simulate
-                })
-                
-                # Update stats
-                self.total_fees_paid += fee_amount
-                self.trades_executed += 1
-                self.daily_trade_count += 1
-                
-                # Save trade to history
-                self.data_manager.add_trade(trade_record)
-                
-                return True, fee_amount, trade_record
-                
-            else:
-                # We're trading between two cryptos (requires two operations)
-                amount_to_trade = self.holdings[sell_coin]
-                
-                if amount_to_trade <= 0:
-                    logger.warning(f"Insufficient {sell_coin} balance")
-                    return False, 0, None
-                
-                # Step 1: Sell to base currency
-                base_amount = amount_to_trade * prices[sell_coin]
-                sell_fee = self.fee_calc.calculate_sell_fee(base_amount)
-                net_base_amount = base_amount - sell_fee
-                
-                # Step 2: Buy the new crypto
-                buy_fee = self.fee_calc.calculate_buy_fee(net_base_amount)
-                net_buy_amount = net_base_amount - buy_fee
-                buy_amount = net_buy_amount / prices[buy_coin]
-                
-                total_fee = sell_fee + buy_fee
-                
-                logger.info(f"Rotating {amount_to_trade:.6f} {sell_coin} to {buy_amount:.6f} {buy_coin}")
-                logger.info(f"Total fees: {total_fee:.6f} {self.base_currency} ({(total_fee/base_amount)*100:.3f}%)")
-                
-                # Execute the trades
-                if not simulate:
-                    # First sell
-                    sell_order = self.exchange.execute_sell(sell_coin, amount_to_trade)
-                    if not sell_order:
-                        logger.error("Sell part of rotation failed")
-                        return False, 0, None
-                    
-                    # Then buy
-                    buy_order = self.exchange.execute_buy(buy_coin, buy_amount)
-                    if not buy_order:
-                        logger.error("Buy part of rotation failed")
-                        return False, sell_fee, None
-                
-                # Update holdings
-                self.holdings[sell_coin] = 0
-                self.holdings[buy_coin] += buy_amount
-                
-                # Complete trade record
-                trade_record.update({
-                    'type': 'rotation',
-                    'amount_sold': amount_to_trade,
-                    'amount_bought': buy_amount,
-                    'price_sold': prices[sell_coin],
-                    'price_bought': prices[buy_coin],
-                    'fee': total_fee,
-                    'fee_currency': self.base_currency,
-                    'simulated': simulate
-                })
-                
-                # Update stats
-                self.total_fees_paid += total_fee
-                self.trades_executed += 1
-                self.daily_trade_count += 1
-                
-                # Save trade to history
-                self.data_manager.add_trade(trade_record)
-                
-                return True, total_fee, trade_record
-                
-        except Exception as e:
-            logger.error(f"Error executing trade: {e}")
+        self._record_trade(trade_record, fee_amount)
+        return True, fee_amount, trade_record
+    
+    def _exec_sell(self, sell_coin, buy_coin, prices, expected_return, timestamp_ns, simulate):
+        """Sell sell_coin for base currency"""
+        amount_to_trade = float(self._amounts[self._coin_index[sell_coin]])
+        
+        if amount_to_trade <= 0:
+            logger.warning(f"Insufficient {sell_coin} balance")
             return False, 0, None
+        
+        base_amount = amount_to_trade * prices[sell_coin]
+        fee_amount = base_amount * self.fee_calc.standard_fee
+        net_base_amount = base_amount * self.fee_calc.sell_multiplier
+        
+        logger.info("Selling %.6f %s at %s %s", amount_to_trade, sell_coin, prices[sell_coin], self.base_currency)
+        logger.info("Fee: %.6f %s (%.3f%%)", fee_amount, self.base_currency, self.fee_calc.standard_fee * 100)
+        
+        # Execute the trade
+        if not simulate:
+            with self._order_lock:
+                order = self.exchange.execute_sell(sell_coin, amount_to_trade)
+            if not order:
+                logger.error("Sell order failed")
+                return False, 0, None
+        
+        # Update holdings
+        with self._state_lock:
+            self._amounts[0] += net_base_amount
+            self._amounts[self._coin_index[sell_coin]] = 0
+            self._update_held(sell_coin)
+        
+        # Trade record
+        trade_record = {
+            'timestamp_ns': timestamp_ns,
+            'sell_coin': sell_coin,
+            'buy_coin': buy_coin,
+            'expected_return': expected_return,
+            'type': 'sell',
+            'amount': amount_to_trade,
+            'price': prices[sell_coin],
+            'fee': fee_amount,
+            'fee_currency': self.base_currency,
+            'simulated': simulate
+        }
+        
+        self._record_trade(trade_record, fee_amount)
+        return True, fee_amount, trade_record
     
-    def calculate_portfolio_value(self, prices):
-        """Calculate current portfolio value in base currency"""
-        total_value = self.holdings[self.base_currency]
-        
-        for coin, amount in self.holdings.items():
-            if coin != self.base_currency and coin in prices:
-                coin_value = amount * prices[coin]
-                total_value += coin_value
-                
-                if amount > 0:
-                    logger.info(f"Holding {amount:.6f} {coin} worth {coin_value:.2f} {self.base_currency}")
+    def _exec_rotation(self, sell_coin, buy_coin, prices, expected_return, timestamp_ns, simulate):
+        """Trade sell_coin for buy_coin through the base currency (requires two operations)"""
+        amount_to_trade = float(self._amounts[self._coin_index[sell_coin]])
+        
+        if amount_to_trade <= 0:
+            logger.warning(f"Insufficient {sell_coin} balance")
+            return False, 0, None
+        
+        # Sell to base currency, then buy the new crypto with what's left after both fees
+        base_amount = amount_to_trade * prices[sell_coin]
+        sell_fee = base_amount * self.fee_calc.standard_fee
+        buy_amount = base_amount * self.fee_calc.rotation_multiplier / prices[buy_coin]
+        
+        total_fee = base_amount * (1.0 - self.fee_calc.rotation_multiplier)
+        
+        logger.info("Rotating %.6f %s to %.6f %s", amount_to_trade, sell_coin, buy_amount, buy_coin)
+        logger.info("Total fees: %.6f %s (%.3f%%)", total_fee, self.base_currency, total_fee / base_amount * 100)
+        
+        # Execute the trades
+        if not simulate:
+            # First sell
+            with self._order_lock:
+                sell_order = self.exchange.execute_sell(sell_coin, amount_to_trade)
+            if not sell_order:
+                logger.error("Sell part of rotation failed")
+                return False, 0, None
+            
+            # Then buy
+            with self._order_lock:
+                buy_order = self.exchange.execute_buy(buy_coin, buy_amount)
+            if not buy_order:
+                logger.error("Buy part of rotation failed")
+                return False, sell_fee, None
+        
+        # Update holdings
+        with self._state_lock:
+            self._amounts[self._coin_index[buy_coin]] += buy_amount
+            self._amounts[self._coin_index[sell_coin]] = 0
+            self._update_held(sell_coin, buy_coin)
+        
+        # Trade record
+        trade_record = {
+            'timestamp_ns': timestamp_ns,
+            'sell_coin': sell_coin,
+            'buy_coin': buy_coin,
+            'expected_return': expected_return,
+            'type': 'rotation',
+            'amount_sold': amount_to_trade,
+            'amount_bought': buy_amount,
+            'price_sold': prices[sell_coin],
+            'price_bought': prices[buy_coin],
+            'fee': total_fee,
+            'fee_currency': self.base_currency,
+            'simulated': simulate
+        }
+        
+        self._record_trade(trade_record, total_fee)
+        return True, total_fee, trade_record
+    
+    def _trade_chains(self, trades):
+        """
+        Group trades that share a coin other than the base currency into chains
+        of trade indices in their original order; different chains are independent
+        """
+        chains = []  # [(coins, indices)]
+        for i, (sell_coin, buy_coin, _) in enumerate(trades):
+            coins = {sell_coin, buy_coin} - {self.base_currency}
+            indices = [i]
+            for chain in [chain for chain in chains if chain[0] & coins]:
+                chains.remove(chain)
+                coins |= chain[0]
+                indices += chain[1]
+            chains.append((coins, sorted(indices)))
+        return [indices for _, indices in chains]
+    
+    def execute_trades(self, trades, prices, simulate=True):
+        """
+        Execute (sell_coin, buy_coin, expected_return) trades
+        Returns a (success, fee_paid, trade_record) result per trade, in order
+        """
+        workers = max(1, self.config.order_workers)
+        if simulate or workers == 1 or len(trades) < 2:
+            return [self.execute_trade(sell_coin, buy_coin, prices, expected_return, simulate)
+                    for sell_coin, buy_coin, expected_return in trades]
+        
+        # Run independent chains of trades concurrently when configured to;
+        # trades on the same coin stay sequential so a coin is never sold twice
+        results = [None] * len(trades)
+        
+        def run_chain(indices):
+            for i in indices:
+                sell_coin, buy_coin, expected_return = trades[i]
+                results[i] = self.execute_trade(sell_coin, buy_coin, prices, expected_return, simulate)
+        
+        chains = self._trade_chains(trades)
+        with ThreadPoolExecutor(max_workers=min(len(chains), workers)) as executor:
+            list(executor.map(run_chain, chains))
+        return results
+    
+    def _update_held(self, *coins):
+        """Keep the set of held coins in step after their amounts changed"""
+        for coin in coins:
+            if self._amounts[self._coin_index[coin]] > 0:
+                self._nonzero_coins.add(coin)
+            else:
+                self._nonzero_coins.discard(coin)
+    
+    def _record_trade(self, trade_record, fee):
+        """Update trading stats and queue the trade for the history, written once per cycle"""
+        with self._state_lock:
+            self.total_fees_paid += fee
+            self.trades_executed += 1
+            self.daily_trade_count += 1
+            self._pending_trades.append(trade_record)
+    
+    def save_pending_trades(self):
+        """Write trades executed since the last call to the history in one batch"""
+        if not self._pending_trades:
+            return
+        
+        self.data_manager.add_trades_batch(self._pending_trades)
+        self._pending_trades.clear()
+    
+    def _holdings_snapshot(self):
+        """Copy the held amounts and coins so they can be read while orders update the live ones"""
+        with self._state_lock:
+            return self._amounts.copy(), frozenset(self._nonzero_coins)
+    
+    def calculate_portfolio_value(self, prices, snapshot=None):
+        """Calculate portfolio value in base currency, from a holdings snapshot if given"""
+        amounts, held = snapshot if snapshot is not None else self._holdings_snapshot()
+        held = sorted(held, key=self._coin_index.__getitem__)
+        
+        # Only held coins need a price; coins without one count as zero, as does the base currency slot.
+        # The vector is local so concurrent valuations don't share state
+        price_vec = np.zeros(len(self._coin_index))
+        for coin in held:
+            price_vec[self._coin_index[coin]] = prices.get(coin, 0.0)
+        total_value = float(amounts[0] + np.vdot(amounts, price_vec))
+        
+        for coin in held:
+            if coin in prices:
+                amount = amounts[self._coin_index[coin]]
+                logger.info(f"Holding {amount:.6f} {coin} worth {amount * prices[coin]:.2f} {self.base_currency}")
         
         logger.info(f"Total portfolio value: {total_value:.2f} {self.base_currency}")
         return total_value
@@ -315,32 +497,37 @@ class TradeLogic:
         """Run a complete trading cycle"""
         logger.info("Starting trading cycle")
         
-        # Get current prices
-        prices = self.exchange.get_current_prices(self.trade_coins)
+        # Get current prices while performance metrics are calculated in the background;
+        # the two only wait on independent exchange requests
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            performance_future = executor.submit(self.performance_calc.calculate_performance, self.trade_coins)
+            prices = self.exchange.get_current_prices(self.trade_coins)
+            performance = performance_future.result()
+        
         if not prices:
             logger.error("Failed to get prices, aborting trading cycle")
             return False
         
-        # Calculate current portfolio value
-        portfolio_value = self.calculate_portfolio_value(prices)
+        # Value and decide on one copy of the holdings, independent of the orders placed below
+        snapshot = self._holdings_snapshot()
         
-        # Calculate performance metrics
-        performance = self.exchange.calculate_performance(self.trade_coins)
+        # Calculate current portfolio value
+        portfolio_value = self.calculate_portfolio_value(prices, snapshot)
         
         # Decide on trades
-        trades_to_execute = self.decide_trades(performance, prices)
+        trades_to_execute = self.decide_trades(performance, prices, snapshot)
         
         # Execute trades
-        for sell_coin, buy_coin, expected_return in trades_to_execute:
-            success, fee_paid, trade_record = self.execute_trade(
-                sell_coin, buy_coin, prices, expected_return, simulate
-            )
-            
+        results = self.execute_trades(trades_to_execute, prices, simulate)
+        for (sell_coin, buy_coin, _), (success, fee_paid, trade_record) in zip(trades_to_execute, results):
             if success:
                 logger.info(f"Successfully executed trade: {sell_coin} -> {buy_coin}")
             else:
                 logger.warning(f"Failed to execute trade: {sell_coin} -> {buy_coin}")
         
+        # Persist this cycle's trades
+        self.save_pending_trades()
+        
         # Save portfolio snapshot
         self.data_manager.save_portfolio_snapshot(self.holdings, prices, portfolio_value)
         
@@ -0,0 +1,5 @@
+# conftest.py - Make the bot modules under src importable in tests
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
\ No newline at end of file
@@ -0,0 +1,78 @@
+# test_data_manager.py - Tests for history storage, rotation and migration
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from data_manager import DataManager, _parquet_partitions
+
+pytest.importorskip("pyarrow")
+
+TRADES = [
+    {'timestamp': '2024-01-01T00:00:00', 'type': 'buy', 'coin': 'BTC', 'amount': 2,
+     'price': 42000.5, 'fee': 0.1, 'order': None},
+    {'timestamp': '2024-01-01T01:00:00', 'type': 'sell', 'coin': 'ETH', 'amount': 1.5,
+     'price': 2200, 'fee': 0.25},
+]
+
+SNAPSHOTS = [
+    {'timestamp': '2024-01-01T00:00:00', 'holdings': {'USDT': 100, 'BTC': 0.0},
+     'prices': {'BTC': 42000.5}, 'total_value': 100},
+    {'timestamp': '2024-01-01T01:00:00', 'holdings': {'ETH': 1.5, 'USDT': None},
+     'prices': {'ETH': 2200.25, 'BTC': 42100}, 'total_value': 3300.375},
+]
+
+
+def make_config(data_dir, rotate_bytes):
+    return SimpleNamespace(data_dir=str(data_dir), parquet_rotate_bytes=rotate_bytes, snapshot_flush_every=1)
+
+
+def write_jsonl(path, records):
+    with open(path, 'w') as f:
+        f.writelines(json.dumps(record) + '\n' for record in records)
+
+
+def assert_identical(loaded, expected):
+    # Key order and int/float types must survive, which == alone does not check
+    assert json.dumps(loaded) == json.dumps(expected)
+
+
+def test_rotation_round_trip(tmp_path):
+    write_jsonl(tmp_path / 'trade_history.jsonl', TRADES)
+    write_jsonl(tmp_path / 'portfolio_snapshots.jsonl', SNAPSHOTS)
+    
+    data_manager = DataManager(make_config(tmp_path, rotate_bytes=1))
+    data_manager.close()
+    
+    assert len(_parquet_partitions(str(tmp_path / 'trade_history.jsonl'))) == 1
+    assert len(_parquet_partitions(str(tmp_path / 'portfolio_snapshots.jsonl'))) == 1
+    assert os.path.getsize(tmp_path / 'trade_history.jsonl') == 0
+    assert_identical(data_manager.trade_history, TRADES)
+    assert_identical(data_manager.portfolio_snapshots, SNAPSHOTS)
+
+
+def test_rotated_history_is_followed_by_the_tail(tmp_path):
+    write_jsonl(tmp_path / 'trade_history.jsonl', TRADES[:1])
+    DataManager(make_config(tmp_path, rotate_bytes=1)).close()
+    
+    data_manager = DataManager(make_config(tmp_path, rotate_bytes=1 << 20))
+    data_manager.add_trades_batch([dict(TRADES[1])])
+    data_manager.close()
+    
+    reloaded = DataManager(make_config(tmp_path, rotate_bytes=1 << 20))
+    reloaded.close()
+    assert_identical(reloaded.trade_history, TRADES)
+
+
+def test_legacy_json_is_migrated_and_rotated(tmp_path):
+    with open(tmp_path / 'trade_history.json', 'w') as f:
+        json.dump(TRADES, f)
+    
+    data_manager = DataManager(make_config(tmp_path, rotate_bytes=1))
+    data_manager.close()
+    
+    assert not os.path.exists(tmp_path / 'trade_history.json')
+    assert os.path.exists(tmp_path / 'trade_history.json.migrated')
+    assert len(_parquet_partitions(str(tmp_path / 'trade_history.jsonl'))) == 1
+    assert_identical(data_manager.trade_history, TRADES)
\ No newline at end of file
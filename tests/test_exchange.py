@@ -0,0 +1,66 @@
+# test_exchange.py - Tests for OHLCV caching
+import ccxt
+
+from exchange import ExchangeHandler
+
+HOUR_MS = 3600 * 1000
+
+
+class FakeClient:
+    """Serves hourly candles up to a movable current bar, which is still forming"""
+    def __init__(self):
+        self.now_bar = 10
+        self.forming_close = 100.0
+        self.requests = []
+    
+    def parse_timeframe(self, timeframe):
+        return ccxt.Exchange.parse_timeframe(timeframe)
+    
+    def fetch_ohlcv(self, pair, timeframe, limit=None):
+        self.requests.append(limit)
+        candles = [[i * HOUR_MS, 1.0, 1.0, 1.0, float(i), 1.0] for i in range(self.now_bar)]
+        candles.append([self.now_bar * HOUR_MS, 1.0, 1.0, 1.0, self.forming_close, 1.0])
+        return candles[-limit:]
+
+
+def make_handler():
+    handler = ExchangeHandler.__new__(ExchangeHandler)
+    handler.exchange = FakeClient()
+    handler.base_currency = "USDT"
+    handler._pairs = {"BTC": "BTC/USDT"}
+    handler._ohlcv_cache = {}
+    return handler
+
+
+def test_forming_bar_is_refetched():
+    handler = make_handler()
+    assert handler.fetch_ohlcv("BTC", "1h", limit=5)[-1][4] == 100.0
+    
+    handler.exchange.forming_close = 105.0
+    ohlcv = handler.fetch_ohlcv("BTC", "1h", limit=5)
+    
+    assert handler.exchange.requests == [5, 2]
+    assert [candle[0] // HOUR_MS for candle in ohlcv] == [6, 7, 8, 9, 10]
+    assert ohlcv[-1][4] == 105.0
+
+
+def test_new_bars_roll_into_the_cached_history():
+    handler = make_handler()
+    handler.fetch_ohlcv("BTC", "1h", limit=5)
+    
+    handler.exchange.now_bar = 11
+    ohlcv = handler.fetch_ohlcv("BTC", "1h", limit=5)
+    
+    assert handler.exchange.requests == [5, 2]
+    assert ohlcv == handler.exchange.fetch_ohlcv("BTC/USDT", "1h", limit=5)
+
+
+def test_gap_in_history_refetches_everything():
+    handler = make_handler()
+    handler.fetch_ohlcv("BTC", "1h", limit=5)
+    
+    handler.exchange.now_bar = 14
+    ohlcv = handler.fetch_ohlcv("BTC", "1h", limit=5)
+    
+    assert handler.exchange.requests == [5, 2, 5]
+    assert [candle[0] // HOUR_MS for candle in ohlcv] == [10, 11, 12, 13, 14]
\ No newline at end of file
@@ -0,0 +1,24 @@
+# test_fee_calculator.py - Tests for fee-adjusted returns
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from fee_calculator import FeeCalculator
+
+
+def test_batch_fee_adjusted_return_by_trade_type():
+    exchange = SimpleNamespace(maker_fee=0.0008, taker_fee=0.001)
+    fee_calc = FeeCalculator(exchange, SimpleNamespace(fee_discount=0, min_profit_threshold=0.005))
+    scores = np.array([4.0, -3.0, 2.0, np.nan])  # Base currency last
+    
+    sell_idx = np.array([3, 1, 2, 0])
+    buy_idx = np.array([0, 3, 3, 2])
+    returns = fee_calc.batch_fee_adjusted_return(sell_idx, buy_idx, scores, 3)
+    
+    assert returns == pytest.approx([
+        0.04 - 0.001,  # Buy: score of the coin bought minus one fee
+        0.03 - 0.001,  # Sell of a loser: avoided loss minus one fee
+        -0.001,  # Sell of a winner: nothing avoided
+        (2.0 - 4.0) / 100 - 0.002,  # Rotation: score difference minus both fees
+    ])
\ No newline at end of file
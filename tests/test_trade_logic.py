@@ -0,0 +1,69 @@
+# test_trade_logic.py - Tests for holdings and trade execution ordering
+from types import SimpleNamespace
+
+import pytest
+
+from trade_logic import TradeLogic
+
+
+def make_trade_logic(order_workers=1):
+    config = SimpleNamespace(base_currency="USDT", trade_coins=("BTC", "ETH", "SOL", "ADA", "DOT"),
+                             trade_amount=100, min_profit_threshold=0.005, order_workers=order_workers)
+    fee_calc = SimpleNamespace(standard_fee=0.001, buy_multiplier=0.999,
+                               sell_multiplier=0.999, rotation_multiplier=0.999 * 0.999)
+    return TradeLogic(None, fee_calc, None, config, None)
+
+
+def test_rotations_into_top_coin_share_one_chain():
+    trade_logic = make_trade_logic()
+    trades = [
+        ("USDT", "SOL", 0.02),  # Buy the top coin
+        ("DOT", "USDT", -0.001),  # Sell a loser
+        ("BTC", "SOL", 0.01),
+        ("ETH", "SOL", 0.01),
+        ("ADA", "SOL", 0.01),
+    ]
+    
+    chains = trade_logic._trade_chains(trades)
+    
+    assert sorted(chains) == [[0, 2, 3, 4], [1]]
+
+
+def test_trades_on_the_same_coin_stay_in_order():
+    trade_logic = make_trade_logic()
+    trades = [("BTC", "USDT", 0.0), ("ETH", "SOL", 0.01), ("SOL", "BTC", 0.01), ("ADA", "DOT", 0.01)]
+    
+    chains = trade_logic._trade_chains(trades)
+    
+    assert sorted(chains) == [[0, 1, 2], [3]]
+
+
+def test_execute_trades_is_sequential_without_order_workers():
+    trade_logic = make_trade_logic(order_workers=0)
+    calls = []
+    trade_logic.execute_trade = lambda sell_coin, buy_coin, prices, expected_return, simulate: \
+        calls.append((sell_coin, buy_coin)) or (True, 0, None)
+    trades = [("USDT", "SOL", 0.02), ("DOT", "USDT", -0.001), ("BTC", "SOL", 0.01)]
+    
+    results = trade_logic.execute_trades(trades, {}, simulate=False)
+    
+    assert calls == [(sell_coin, buy_coin) for sell_coin, buy_coin, _ in trades]
+    assert results == [(True, 0, None)] * len(trades)
+
+def test_holdings_cannot_be_modified_in_place():
+    trade_logic = make_trade_logic()
+    
+    with pytest.raises(TypeError):
+        trade_logic.holdings["BTC"] = 1.0
+    assert trade_logic.holdings["BTC"] == 0.0
+
+
+def test_holdings_setter_updates_amounts_and_held_coins():
+    trade_logic = make_trade_logic()
+    
+    trade_logic.holdings = {"USDT": 50.0, "ETH": 0.5}
+    
+    assert dict(trade_logic.holdings) == {"USDT": 50.0, "BTC": 0.0, "ETH": 0.5, "SOL": 0.0, "ADA": 0.0, "DOT": 0.0}
+    assert trade_logic._holdings_snapshot()[1] == {"ETH"}
+    with pytest.raises(ValueError):
+        trade_logic.holdings = {"XRP": 1.0}
\ No newline at end of file